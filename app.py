@@ -1,7 +1,12 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
 import plotly.express as px
+import plotly.graph_objects as go
 from datetime import datetime
+import contextlib
 import os
 
 
@@ -14,14 +19,71 @@ st.set_page_config(
 )
 
 
+# ========== 城市经纬度（用于销售地图） ==========
+# 预定义城市经纬度（简单示例，可按需扩展）
+CITY_COORDS = {
+    "北京": (39.9042, 116.4074),
+    "天津": (39.3434, 117.3616),
+    "上海": (31.2304, 121.4737),
+    "广州": (23.1291, 113.2644),
+    "深圳": (22.5431, 114.0579),
+    "杭州": (30.2741, 120.1551),
+    "南京": (32.0603, 118.7969),
+    "成都": (30.5728, 104.0668),
+    "重庆": (29.5630, 106.5516),
+    "武汉": (30.5928, 114.3055),
+    "西安": (34.3416, 108.9398),
+}
+COORDS_DF = pd.DataFrame(
+    [(city, lat, lon) for city, (lat, lon) in CITY_COORDS.items()],
+    columns=["销售地区", "lat", "lon"],
+)
+
+
 # ========== 读取真实销售数据 ==========
-@st.cache_data(ttl=300)
-def load_sales_data(path: str, file_mtime: float) -> pd.DataFrame:
-    """读取 Excel 并做基础清洗.
+# 取值有限、频繁参与筛选和分组的文本列，加载时转为 category 类型
+CATEGORY_COLUMNS = ("产品类别", "销售地区", "商品名称")
+# 看板实际用到的列；其余列（如手工添加的备注列）加载时丢弃，不参与 Arrow 转换
+SALES_COLUMNS = ("日期", "日期_仅日期", "产品类别", "商品名称", "销售地区", "销售数量", "单价", "总金额")
+
+
+def _prepare_sales_df(df: pd.DataFrame) -> pd.DataFrame:
+    """转换列类型、按日期排序、增加仅日期列并只保留看板用到的列, Excel 和 Parquet 两条读取路径共用."""
+    for col in CATEGORY_COLUMNS:
+        df[col] = df[col].astype("category")
+    df = df.sort_values("日期")
+    # 仅日期列保持 datetime64 类型（截断到天），比逐个 datetime.date 对象比较快得多
+    df["日期_仅日期"] = df["日期"].to_numpy().astype("datetime64[D]")
+    return df[[c for c in SALES_COLUMNS if c in df.columns]]
+
+
+@st.cache_resource(ttl=300)
+def load_sales_data(path: str, file_mtime: float) -> pa.Table:
+    """读取 Parquet 或 Excel 数据文件并做基础清洗, 返回 Arrow 表.
 
     file_mtime 参与缓存键, 当文件更新时间变化或超过 ttl 时会自动重新加载.
+    读取 Excel 后会在旁边写一份 Parquet 快照（<Excel 文件名>.parquet）,
+    之后只要快照不早于 Excel 就直接读取快照.
+    Arrow 表不可变, 因此用 cache_resource 直接共享同一份数据, 取用时不必序列化拷贝;
+    调用方按需 to_pandas().
     """
-    df = pd.read_excel(path)
+    if path.endswith(".parquet"):
+        df = _prepare_sales_df(pd.read_parquet(path))
+        return pa.Table.from_pandas(df)
+
+    snapshot_path = path + ".parquet"
+    if os.path.exists(snapshot_path) and os.path.getmtime(snapshot_path) >= file_mtime:
+        try:
+            snapshot_df = pd.read_parquet(snapshot_path)
+        except Exception:
+            # 快照损坏或无法读取时忽略它，重新解析 Excel
+            snapshot_df = None
+        if snapshot_df is not None:
+            # 快照写入前已经过 _prepare_sales_df 处理，直接使用
+            return pa.Table.from_pandas(snapshot_df)
+
+    # calamine（Rust 实现）比默认的 openpyxl 解析快得多
+    df = pd.read_excel(path, engine="calamine")
     # 先统一清洗列名：去掉引号和首尾空格
     clean_cols = []
     for c in df.columns:
@@ -43,9 +105,89 @@ def load_sales_data(path: str, file_mtime: float) -> pd.DataFrame:
     # 确保日期为 datetime 类型
     if not pd.api.types.is_datetime64_any_dtype(df["日期"]):
         df["日期"] = pd.to_datetime(df["日期"])
-    return df
 
-data_path = "supermarket_sales.xlsx"
+    df = _prepare_sales_df(df)
+
+    # 写入 Parquet 快照：先写临时文件再替换，中途失败不会留下不完整的快照。
+    # 快照只是缓存，任何写入失败（目录不可写、列类型无法转换等）都忽略，下次仍从 Excel 读取
+    tmp_path = snapshot_path + ".tmp"
+    try:
+        df.to_parquet(tmp_path, engine="pyarrow", compression="zstd")
+        os.replace(tmp_path, snapshot_path)
+    except Exception:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+    return pa.Table.from_pandas(df)
+
+
+@st.cache_data(ttl=300)
+def load_filter_options(path: str, file_mtime: float) -> tuple[list, list]:
+    """返回侧边栏的产品类别和销售地区选项, 与数据文件使用相同的缓存键."""
+    table = load_sales_data(path, file_mtime)
+    return (
+        sorted(table.column("产品类别").unique().to_pylist()),
+        sorted(table.column("销售地区").unique().to_pylist()),
+    )
+
+
+def selection_mask(col: pd.Series, selected: list) -> np.ndarray:
+    """按 category 编码查表, 返回 col 中取值属于 selected 的布尔掩码."""
+    categories = col.cat.categories
+    # 多留一个恒为 False 的位置：缺失值的编码为 -1，正好索引到它
+    allowed = np.zeros(len(categories) + 1, dtype=bool)
+    idx = categories.get_indexer(selected)
+    allowed[idx[idx >= 0]] = True
+    return allowed[col.cat.codes.to_numpy()]
+
+
+def recent_trend_pct(daily_totals: np.ndarray) -> float:
+    """最近 7 天日均销售额相对之前 7 天的涨跌百分比.
+
+    daily_totals 为按日期升序的每日销售额; 不足 8 天时返回 0.
+    """
+    n = len(daily_totals)
+    if n <= 7:
+        return 0.0
+    # 与 tail(14).head(7) 一致：不足 14 天时，“之前 7 天”从第一天开始取
+    prev_start = max(n - 14, 0)
+    prev_avg = daily_totals[prev_start:prev_start + 7].mean()
+    recent_avg = daily_totals[n - 7:].mean()
+    if prev_avg > 0:
+        return float((recent_avg - prev_avg) / prev_avg * 100)
+    return 0.0
+
+
+def daily_totals(df: pd.DataFrame) -> pd.DataFrame:
+    """按天汇总总金额, 返回按日期升序、只含有销售记录日期的 (日期_仅日期, 销售额) 表.
+
+    df 需已按日期排序; 日期按天取整后是连续整数, 直接用 np.bincount 求和.
+    """
+    days = df["日期_仅日期"].to_numpy().astype("datetime64[D]")
+    if len(days) == 0:
+        return pd.DataFrame({"日期_仅日期": days, "销售额": np.empty(0)})
+
+    codes = (days - days[0]).astype(np.intp)
+    amounts = df["总金额"].to_numpy(dtype="f8", na_value=0.0)
+    sums = np.bincount(codes, weights=amounts)
+    # 只保留有销售记录的日期，与 groupby 的结果保持一致
+    has_sales = np.bincount(codes) > 0
+    return pd.DataFrame(
+        {
+            "日期_仅日期": days[0] + np.flatnonzero(has_sales),
+            "销售额": sums[has_sales],
+        }
+    )
+
+
+# 销售明细表最多展示的行数
+ORDERS_MAX_ROWS = 500
+
+
+parquet_path = "supermarket_sales.parquet"
+excel_path = "supermarket_sales.xlsx"
+
+# 生成脚本输出的 Parquet 文件是主数据源，不存在时再读取 Excel
+data_path = parquet_path if os.path.exists(parquet_path) else excel_path
 
 try:
     # 检查文件是否存在
@@ -53,23 +195,23 @@ try:
         # 列出当前目录的所有文件（用于调试）
         try:
             files_in_dir = os.listdir(".")
-            excel_files = [f for f in files_in_dir if f.endswith('.xlsx')]
+            data_files = [f for f in files_in_dir if f.endswith(('.parquet', '.xlsx'))]
         except:
-            excel_files = []
+            data_files = []
         
-        st.error(f"❌ 未找到数据文件 `{data_path}`")
+        st.error(f"❌ 未找到数据文件 `{parquet_path}` 或 `{excel_path}`")
         st.info("**请检查以下事项:**")
         st.info("1. 文件是否已上传到 GitHub 仓库根目录？")
-        st.info("2. 文件名是否完全一致（包括大小写和 `.xlsx` 后缀）？")
-        if excel_files:
-            st.info(f"3. 当前目录中的 Excel 文件: {', '.join(excel_files)}")
+        st.info("2. 文件名是否完全一致（包括大小写和 `.parquet` / `.xlsx` 后缀）？")
+        if data_files:
+            st.info(f"3. 当前目录中的 Parquet / Excel 文件: {', '.join(data_files)}")
         else:
-            st.warning("3. 当前目录中没有找到任何 `.xlsx` 文件")
+            st.warning("3. 当前目录中没有找到任何 `.parquet` 或 `.xlsx` 文件")
         st.stop()
     
     # 文件存在，尝试加载
     file_mtime = os.path.getmtime(data_path)
-    raw_df = load_sales_data(data_path, file_mtime)
+    raw_df = load_sales_data(data_path, file_mtime).to_pandas()
     
 except FileNotFoundError:
     st.error(f"❌ 文件未找到: `{data_path}`")
@@ -79,17 +221,19 @@ except Exception as e:
     st.error(f"❌ 加载数据时发生错误: {type(e).__name__}: {e}")
     st.stop()
 
-# 排序并增加仅日期列，便于筛选
-raw_df = raw_df.sort_values("日期").copy()
-raw_df["日期_仅日期"] = raw_df["日期"].dt.date
+# 仅日期列的 numpy 视图（已排序），供日期范围控件和二分查找使用
+date_arr = raw_df["日期_仅日期"].to_numpy()
 
 
 # ========== 侧边栏：基于真实数据的筛选条件 ==========
 with st.sidebar:
     st.markdown("## ⚙️ 筛选条件")
 
-    min_date = raw_df["日期_仅日期"].min()
-    max_date = raw_df["日期_仅日期"].max()
+    # raw_df 已按日期排序，首尾即最小/最大日期；date_input 需要 datetime.date
+    min_date = date_arr[0].astype("datetime64[D]").astype(object)
+    max_date = date_arr[-1].astype("datetime64[D]").astype(object)
+
+    category_options, region_options = load_filter_options(data_path, file_mtime)
 
     date_range = st.date_input(
         "日期范围",
@@ -98,32 +242,47 @@ with st.sidebar:
         max_value=max_date,
     )
 
-    category_options = sorted(raw_df["产品类别"].unique().tolist())
     selected_categories = st.multiselect(
         "产品类别",
         options=category_options,
         default=category_options,
     )
 
-    region_options = sorted(raw_df["销售地区"].unique().tolist())
     selected_regions = st.multiselect(
         "销售地区（城市）",
         options=region_options,
         default=region_options,
     )
 
-mask = (
-    (raw_df["日期_仅日期"] >= date_range[0])
-    & (raw_df["日期_仅日期"] <= date_range[1])
-    & (raw_df["产品类别"].isin(selected_categories))
-    & (raw_df["销售地区"].isin(selected_regions))
+# raw_df 已按日期排序：日期条件用二分查找直接得到行范围，再在切片上做类别/地区筛选
+lo = np.searchsorted(date_arr, np.datetime64(date_range[0]), side="left")
+hi = np.searchsorted(date_arr, np.datetime64(date_range[1]), side="right")
+date_slice = raw_df.iloc[lo:hi]
+
+category_mask = selection_mask(date_slice["产品类别"], selected_categories)
+region_mask = selection_mask(date_slice["销售地区"], selected_regions)
+filtered_df = date_slice[category_mask & region_mask]
+
+# 筛选后一次性计算各区块共用的汇总结果，避免重复 groupby
+daily_sales = daily_totals(filtered_df)
+category_sales = (
+    filtered_df.groupby("产品类别", observed=True)["总金额"]
+    .sum()
+    .reset_index(name="销售额")
+)
+# 地图只用得到有坐标的城市，先过滤再分组；只取分组需要的两列
+has_coords = selection_mask(filtered_df["销售地区"], list(CITY_COORDS))
+city_sales = (
+    filtered_df.loc[has_coords, ["销售地区", "总金额"]]
+    .groupby("销售地区", observed=True)["总金额"]
+    .sum()
+    .reset_index(name="销售额")
 )
-filtered_df = raw_df[mask]
 
 
 # ========== 页面标题与头部区域（Header） ==========
-st.markdown(
-    """
+# 样式、Logo、状态标记和主标题都是静态内容，合并为一次 st.markdown 输出
+HEADER_HTML = """
     <style>
     .main-title {
         font-size: 30px;
@@ -184,15 +343,7 @@ st.markdown(
         box-shadow: 0 0 0 4px rgba(22, 163, 74, 0.25);
     }
     </style>
-    """,
-    unsafe_allow_html=True,
-)
-
-header_left, header_right = st.columns([4, 1])
-
-with header_left:
-    st.markdown(
-        """
+    <div style="display:flex;align-items:center;justify-content:space-between;">
         <div class="header-logo">
             <div class="logo-mark">SS</div>
             <div>
@@ -200,28 +351,19 @@ with header_left:
                 <div class="logo-text-sub">超市经营数据 · 销售洞察与趋势监控</div>
             </div>
         </div>
-        """,
-        unsafe_allow_html=True,
-    )
-
-with header_right:
-    st.markdown(
-        """
-        <div style="display:flex;justify-content:flex-end;">
-            <span class="status-badge">
-                <span class="status-dot"></span>
-                数据就绪
-            </span>
-        </div>
-        """,
-        unsafe_allow_html=True,
-    )
+        <span class="status-badge">
+            <span class="status-dot"></span>
+            数据就绪
+        </span>
+    </div>
+    <div class="main-title">超市销售数据看板</div>
+    """
 
-st.markdown('<div class="main-title">超市销售数据看板</div>', unsafe_allow_html=True)
+st.markdown(HEADER_HTML, unsafe_allow_html=True)
 
 date_range_text = f"{date_range[0]} 至 {date_range[1]}"
 subtitle_text = (
-    f"数据文件：supermarket_sales.xlsx ｜ 当前筛选日期：{date_range_text} ｜ "
+    f"数据文件：{data_path} ｜ 当前筛选日期：{date_range_text} ｜ "
     f"维度：产品类别、商品、销售地区、每日销售额"
 )
 st.markdown(f'<div class="sub-title">{subtitle_text}</div>', unsafe_allow_html=True)
@@ -238,24 +380,7 @@ else:
     unique_products = int(filtered_df["商品名称"].nunique())
 
     # 销售趋势分析：最近 7 天 vs 之前 7 天
-    daily_sales = (
-        filtered_df.groupby("日期_仅日期")["总金额"]
-        .sum()
-        .reset_index(name="销售额")
-        .sort_values("日期_仅日期")
-    )
-
-    recent_7 = daily_sales.tail(7)
-    if len(daily_sales) > 7:
-        prev_7 = daily_sales.tail(14).head(7)
-        prev_avg = prev_7["销售额"].mean()
-        recent_avg = recent_7["销售额"].mean()
-        if prev_avg > 0:
-            trend_pct = (recent_avg - prev_avg) / prev_avg * 100
-        else:
-            trend_pct = 0.0
-    else:
-        trend_pct = 0.0
+    trend_pct = recent_trend_pct(daily_sales["销售额"].to_numpy())
 
     trend_direction = "上涨" if trend_pct >= 0 else "下降"
     trend_display_pct = abs(trend_pct)
@@ -284,22 +409,19 @@ st.markdown("---")
 st.markdown("### 销售趋势（按日汇总）")
 
 if not filtered_df.empty:
-    daily_sales = (
-        filtered_df.groupby("日期_仅日期")["总金额"]
-        .sum()
-        .reset_index(name="销售额")
-        .sort_values("日期_仅日期")
-    )
-
-    trend_chart = px.line(
-        daily_sales.tail(30),  # 最近 30 天数据，如果不足则全用
-        x="日期_仅日期",
-        y="销售额",
-        markers=True,
-        template="plotly_white",
+    trend_df = daily_sales.tail(30)  # 最近 30 天数据，如果不足则全用
+
+    # 使用 WebGL（scattergl）渲染折线，避免逐点生成 SVG 节点
+    trend_chart = go.Figure(
+        go.Scattergl(
+            x=trend_df["日期_仅日期"],
+            y=trend_df["销售额"],
+            mode="lines+markers",
+            line_color="#2563eb",
+        )
     )
-    trend_chart.update_traces(line_color="#2563eb")
     trend_chart.update_layout(
+        template="plotly_white",
         margin=dict(l=10, r=10, t=30, b=10),
         xaxis_title="日期",
         yaxis_title="销售额（¥）",
@@ -316,10 +438,15 @@ st.markdown("---")
 st.markdown("### 销售结构（按产品类别占比）")
 
 if not filtered_df.empty:
-    category_sales = (
-        filtered_df.groupby("产品类别")["总金额"]
-        .sum()
-        .reset_index(name="销售额")
+    # 在服务端一次性算好“类别 + 占比”标签，前端直接显示文本；
+    # 格式与 Plotly 的 percent+label 一致：类别和占比分两行，占比保留 3 位有效数字
+    category_total = category_sales["销售额"].sum()
+    if category_total > 0:
+        category_share = category_sales["销售额"] / category_total * 100
+    else:
+        category_share = pd.Series(0.0, index=category_sales.index)
+    category_labels = (
+        category_sales["产品类别"].astype(str) + "<br>" + category_share.map("{:.3g}%".format)
     )
 
     category_pie = px.pie(
@@ -328,7 +455,7 @@ if not filtered_df.empty:
         values="销售额",
         hole=0.3,
     )
-    category_pie.update_traces(textposition="inside", textinfo="percent+label")
+    category_pie.update_traces(text=category_labels, textposition="inside", textinfo="text")
     category_pie.update_layout(margin=dict(l=10, r=10, t=30, b=10))
 
     st.plotly_chart(category_pie, use_container_width=True)
@@ -342,30 +469,8 @@ st.markdown("---")
 st.markdown("### 中国销售地图（按城市销售额）")
 
 if not filtered_df.empty:
-    # 预定义城市经纬度（简单示例，可按需扩展）
-    CITY_COORDS = {
-        "北京": (39.9042, 116.4074),
-        "天津": (39.3434, 117.3616),
-        "上海": (31.2304, 121.4737),
-        "广州": (23.1291, 113.2644),
-        "深圳": (22.5431, 114.0579),
-        "杭州": (30.2741, 120.1551),
-        "南京": (32.0603, 118.7969),
-        "成都": (30.5728, 104.0668),
-        "重庆": (29.5630, 106.5516),
-        "武汉": (30.5928, 114.3055),
-        "西安": (34.3416, 108.9398),
-    }
-
-    city_sales = (
-        filtered_df.groupby("销售地区")["总金额"]
-        .sum()
-        .reset_index(name="销售额")
-    )
-
-    city_sales["lat"] = city_sales["销售地区"].map(lambda c: CITY_COORDS.get(c, (None, None))[0])
-    city_sales["lon"] = city_sales["销售地区"].map(lambda c: CITY_COORDS.get(c, (None, None))[1])
-    city_sales = city_sales.dropna(subset=["lat", "lon"])
+    # 内连接补上经纬度（city_sales 中的城市都在坐标表里）
+    city_sales = city_sales.merge(COORDS_DF, on="销售地区", how="inner")
 
     if not city_sales.empty:
         city_map_fig = px.scatter_geo(
@@ -402,12 +507,19 @@ st.markdown("### 最新销售明细")
 if not filtered_df.empty:
     search_keyword = st.text_input("按商品名称搜索", value="")
 
-    orders_view = filtered_df.sort_values("日期", ascending=False).copy()
-
+    # filtered_df 已按日期升序，先按关键字筛选，再倒序取最新的若干条，无需整表排序
+    orders_view = filtered_df
     if search_keyword:
-        orders_view = orders_view[
-            orders_view["商品名称"].str.contains(search_keyword, case=False, na=False)
-        ]
+        # 商品名称是 category 类型：只在去重后的类别值上用 Arrow 做子串匹配，再按编码筛选行
+        product_names = orders_view["商品名称"].cat
+        matched = pc.match_substring(
+            pa.array(product_names.categories.tolist(), type=pa.string()),
+            search_keyword,
+            ignore_case=True,
+        )
+        matched_codes = np.flatnonzero(matched.to_numpy(zero_copy_only=False))
+        orders_view = orders_view[np.isin(product_names.codes.to_numpy(), matched_codes)]
+    orders_view = orders_view.iloc[::-1].head(ORDERS_MAX_ROWS)
 
     st.dataframe(
         orders_view[["日期", "产品类别", "商品名称", "销售数量", "单价", "总金额"]],
@@ -9,7 +9,7 @@ def main():
     end_date = datetime(2024, 12, 31)
     num_days = (end_date - start_date).days + 1
 
-    dates = [start_date + timedelta(days=i) for i in range(num_days)]
+    dates = np.arange(start_date, end_date + timedelta(days=1), dtype="datetime64[D]")
 
     # 产品类别与商品
     categories = {
@@ -33,46 +33,53 @@ def main():
         ("西安", "西北"),
     ]
 
-    np.random.seed(2024)
-    rows = []
-
-    for current_date in dates:
-        # 每天生成 30~80 条销售记录
-        num_records = np.random.randint(30, 81)
-        for _ in range(num_records):
-            category = np.random.choice(list(categories.keys()))
-            product = np.random.choice(categories[category])
-            quantity = np.random.randint(1, 11)
-            city, region = cities[np.random.randint(0, len(cities))]
-
-            # 根据类别设定一个合理的单价区间（人民币）
-            if category == "水果":
-                unit_price = np.round(np.random.uniform(3, 25), 2)
-            elif category == "蔬菜":
-                unit_price = np.round(np.random.uniform(2, 15), 2)
-            else:  # 乳制品
-                unit_price = np.round(np.random.uniform(5, 40), 2)
-
-            total_amount = np.round(quantity * unit_price, 2)
-
-            rows.append(
-                {
-                    "日期": current_date.date(),
-                    "产品类别": category,
-                    "商品名称": product,
-                    "销售地区": city,
-                    "销售数量": quantity,
-                    "单价": unit_price,
-                    "总金额": total_amount,
-                }
-            )
-
-    # 构建 DataFrame
-    sales_df = pd.DataFrame(rows)
+    # 根据类别设定一个合理的单价区间（人民币）
+    price_ranges = {
+        "水果": (3, 25),
+        "蔬菜": (2, 15),
+        "乳制品": (5, 40),
+    }
+
+    category_names = np.array(list(categories.keys()))
+    # 所有商品拼成一个数组，按类别记录起始偏移和商品个数
+    product_names = np.array([p for products in categories.values() for p in products])
+    product_counts = np.array([len(products) for products in categories.values()])
+    product_offsets = np.concatenate([[0], np.cumsum(product_counts)[:-1]])
+    price_low = np.array([price_ranges[c][0] for c in category_names], dtype=float)
+    price_high = np.array([price_ranges[c][1] for c in category_names], dtype=float)
+    city_names = np.array([city for city, _ in cities])
+
+    rng = np.random.default_rng(2024)
+
+    # 每天生成 30~80 条销售记录，一次性生成全部记录
+    counts = rng.integers(30, 81, size=num_days)
+    total = int(counts.sum())
+    date_col = np.repeat(dates, counts)
+
+    category_idx = rng.integers(0, len(category_names), size=total)
+    product_idx = product_offsets[category_idx] + rng.integers(0, product_counts[category_idx])
+    quantity = rng.integers(1, 11, size=total)
+    city_idx = rng.integers(0, len(city_names), size=total)
+
+    unit_price = np.round(rng.uniform(price_low[category_idx], price_high[category_idx]), 2)
+    total_amount = np.round(quantity * unit_price, 2)
+
+    # 构建 DataFrame：文本列直接由下标构造为 category，不逐行生成字符串
+    sales_df = pd.DataFrame(
+        {
+            "日期": date_col,
+            "产品类别": pd.Categorical.from_codes(category_idx, category_names),
+            "商品名称": pd.Categorical.from_codes(product_idx, product_names),
+            "销售地区": pd.Categorical.from_codes(city_idx, city_names),
+            "销售数量": quantity,
+            "单价": unit_price,
+            "总金额": total_amount,
+        }
+    )
 
     # 保存到当前项目目录
-    output_path = "supermarket_sales.xlsx"
-    sales_df.to_excel(output_path, index=False)
+    output_path = "supermarket_sales.parquet"
+    sales_df.to_parquet(output_path, engine="pyarrow", compression="zstd")
     print(f"生成完成: {output_path}, 记录数: {len(sales_df)}")
 
 